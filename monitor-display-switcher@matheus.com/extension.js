@@ -15,6 +15,7 @@ import { HdmiToggle } from './quickSettingsToggle.js';
 
 const REF_HIGH_RES = { width: 1920, height: 1200, marginTop: 150, iconSize: 55, fontSize: 30 };
 const REF_LOW_RES  = { width: 864,  height: 486,  marginTop: 50,  iconSize: 25, fontSize: 15 };
+const SWITCH_SCRIPT_TIMEOUT = 10; // seconds
     
 class FileMonitor {
     constructor(callback) {
@@ -47,6 +48,115 @@ class FileMonitor {
     }
 }
 
+// Serializes display switch requests: only one apply runs at a time and
+// queued requests collapse so that only the latest one is applied.
+class SwitchScheduler {
+    constructor(runner) {
+        this._runner = runner;
+        this._nextId = 0;
+        this._pending = null;
+        this._inFlight = null;
+        this._superseded = [];
+        this._destroyed = false;
+    }
+
+    request(mode) {
+        const id = ++this._nextId;
+
+        return new Promise((resolve) => {
+            if (this._pending) {
+                log(`[Switch] Request #${this._pending.id} (${this._pending.mode}) superseded by #${id} (${mode})`);
+                this._superseded.push(this._pending);
+            }
+            this._pending = { id, mode, resolve };
+
+            // In-flight work that has not reached Mutter yet is dropped once
+            // its connection probe finishes; the probe itself is left to run
+            // so it never races the next job writing state.json.
+            if (this._inFlight && this._inFlight.cancellable && !this._inFlight.cancellable.is_cancelled()) {
+                log(`[Switch] Dropping in-flight request #${this._inFlight.id} (${this._inFlight.mode})`);
+                this._inFlight.cancellable.cancel();
+            }
+
+            if (!this._inFlight) {
+                this._drain();
+            }
+        });
+    }
+
+    async _drain() {
+        while (this._pending) {
+            const job = this._pending;
+            this._pending = null;
+
+            this._inFlight = { id: job.id, mode: job.mode, cancellable: new Gio.Cancellable(), committed: false };
+            const inFlight = this._inFlight;
+
+            let status;
+            try {
+                // The runner calls commit() right before reconfiguring the
+                // displays; from then on the job can no longer be cancelled.
+                const applied = await this._runner(job.mode, inFlight.cancellable, () => {
+                    inFlight.cancellable = null;
+                    inFlight.committed = true;
+                });
+                status = applied ? 'applied' : 'skipped';
+            } catch (e) {
+                log(`[Switch] Request #${job.id} (${job.mode}) failed: ${e.message}`);
+                status = 'failed';
+            }
+
+            this._inFlight = null;
+            if (this._destroyed) {
+                if (!inFlight.committed) {
+                    status = 'cancelled';
+                }
+                job.resolve({ id: job.id, mode: job.mode, status, winner: status === 'applied' ? job.id : null });
+                return;
+            }
+
+            if (status !== 'applied' && this._pending) {
+                log(`[Switch] Request #${job.id} (${job.mode}) superseded by #${this._pending.id} (${this._pending.mode})`);
+                this._superseded.push(job);
+                continue;
+            }
+
+            // Requests older than this one were superseded by it; they only
+            // have a winner if this job actually reconfigured the displays.
+            if (status === 'applied') {
+                const settled = this._settleSuperseded(job.id, 'superseded', job.id);
+                log(`[Switch] Request #${job.id} (${job.mode}) applied, winner over ${settled} request(s)`);
+                job.resolve({ id: job.id, mode: job.mode, status, winner: job.id });
+            } else {
+                this._settleSuperseded(job.id, status, null);
+                log(`[Switch] Request #${job.id} (${job.mode}) ${status}, no winner`);
+                job.resolve({ id: job.id, mode: job.mode, status, winner: null });
+            }
+        }
+    }
+
+    _settleSuperseded(beforeId, status, winner) {
+        const settled = this._superseded.filter(job => job.id < beforeId);
+        this._superseded = this._superseded.filter(job => !settled.includes(job));
+        for (const job of settled) {
+            job.resolve({ id: job.id, mode: job.mode, status, winner });
+        }
+        return settled.length;
+    }
+
+    destroy() {
+        this._destroyed = true;
+        if (this._pending) {
+            this._superseded.push(this._pending);
+            this._pending = null;
+        }
+        this._settleSuperseded(Infinity, 'cancelled', null);
+        if (this._inFlight && this._inFlight.cancellable) {
+            this._inFlight.cancellable.cancel();
+        }
+    }
+}
+
 export default class DisplaySwitcher extends Extension {
     constructor(metadata) {
         super(metadata);
@@ -112,6 +222,9 @@ export default class DisplaySwitcher extends Extension {
             }
         });
 
+        this._switchScheduler = new SwitchScheduler((mode, cancellable, commit) =>
+            this._applyDisplayMode(mode, cancellable, commit));
+
         // Initial Detection
         this._detectCurrentDisplayMode();
     }
@@ -121,6 +234,10 @@ export default class DisplaySwitcher extends Extension {
             GLib.source_remove(this._interval);
             this._interval = null;
         }
+        if (this._switchScheduler) {
+            this._switchScheduler.destroy();
+            this._switchScheduler = null;
+        }
         this._removeHdmiMenu();
         this._removeHdmiWindow();
         Main.wm.removeKeybinding(this._keybindingId);
@@ -712,9 +829,26 @@ export default class DisplaySwitcher extends Extension {
         this._firstExecution = true;
     }
 
-    async _setDisplayMode(mode) {
+    _setDisplayMode(mode) {
+        if (!this._switchScheduler) {
+            return Promise.resolve(null);
+        }
+        return this._switchScheduler.request(mode);
+    }
+
+    async _applyDisplayMode(mode, cancellable, commit) {
+        if (!['internal', 'external', 'join', 'mirror'].includes(mode)) {
+            log(`Unknown display mode: ${mode}`);
+            return false;
+        }
+
         let connect = await this._runCommand();
-        
+
+        // A newer request arrived while we were probing the connection
+        if (cancellable.is_cancelled()) {
+            return false;
+        }
+
         if (!connect) {
             if (this._hdmiToggle) {
                 this._hdmiToggle.setActiveState(false);
@@ -724,7 +858,7 @@ export default class DisplaySwitcher extends Extension {
                 Gettext.dgettext(this._gettextDomain, "Cannot switch mode without HDMI connection."),
                 "video-display-symbolic"
             );
-            return;
+            return false;
         }
 
         if (this._hdmiToggle) {
@@ -734,30 +868,47 @@ export default class DisplaySwitcher extends Extension {
 
         const scriptPathSwitch = this.path + '/scripts/hdmi-swicth-python.py';
 
-        switch (mode) {
-            case 'internal':
-                log("Applying internal display mode...");
-                GLib.spawn_command_line_async(`python3 ${scriptPathSwitch} internal`);
-                break;
-            case 'external':
-                log("Applying external display mode...");
-                GLib.spawn_command_line_async(`python3 ${scriptPathSwitch} external`);
-                break;
-            case 'join':
-                log("Applying join display mode...");
-                GLib.spawn_command_line_async(`python3 ${scriptPathSwitch} join`);
-                break;
-            case 'mirror':
-                log("Applying mirror display mode...");
-                GLib.spawn_command_line_async(`python3 ${scriptPathSwitch} mirror`);
-                break;
-            default:
-                log(`Unknown display mode: ${mode}`);
+        log(`Applying ${mode} display mode...`);
+        commit();
+        this._removeHdmiWindow();
+
+        // Wait for the switch script so the next request reads a fresh serial;
+        // a stuck script is killed so it cannot hold up the queue.
+        await new Promise((resolve, reject) => {
+            let proc;
+            try {
+                proc = Gio.Subprocess.new(
+                    ['python3', scriptPathSwitch, mode],
+                    Gio.SubprocessFlags.NONE
+                );
+            } catch (e) {
+                reject(new Error(`Failed to spawn switch script: ${e.message}`));
                 return;
-        }
+            }
+
+            let timeoutReached = false;
+            const timeoutId = GLib.timeout_add_seconds(GLib.PRIORITY_DEFAULT, SWITCH_SCRIPT_TIMEOUT, () => {
+                timeoutReached = true;
+                proc.force_exit();
+                reject(new Error(`Switch script timed out after ${SWITCH_SCRIPT_TIMEOUT}s`));
+                return GLib.SOURCE_REMOVE;
+            });
+
+            proc.wait_check_async(null, (p, res) => {
+                if (timeoutReached) return;
+                GLib.source_remove(timeoutId);
+
+                try {
+                    p.wait_check_finish(res);
+                    resolve();
+                } catch (e) {
+                    reject(new Error(`Switch script failed: ${e.message}`));
+                }
+            });
+        });
 
         log(`Display mode set to: ${mode}`);
-        this._removeHdmiWindow();
+        return true;
     }
 
     _cycleDisplayMode() {